@@ -1,18 +1,16 @@
 import streamlit as st
 import streamlit.components.v1 as components
-from openai import OpenAI
 import os
 import base64
-import requests
 import time
 import uuid
 import threading
-import asyncio
 import json
 import queue
-import websockets
 from typing import Optional
-from elevenlabs.client import ElevenLabs
+
+from model_router import ModelRouter, Route
+from warmup import ImportWarmer
 
 from dotenv import load_dotenv
 load_dotenv()
@@ -25,13 +23,39 @@ st.set_page_config(page_title="Simple AI Chatbot", page_icon="🤖")
 
 st.title("🤖 Simple AI Chatbot")
 
+
+# Heavy SDKs (openai, elevenlabs, websockets, requests) are imported lazily on
+# the code paths that use them; warm them in the background once per process
+# so the first chat turn doesn't pay the import cost.
+@st.cache_resource
+def get_import_warmer(modules: tuple) -> ImportWarmer:
+    return ImportWarmer(list(modules)).start()
+
+
+@st.cache_resource
+def get_openai_client(api_key: str):
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key)
+
+
+get_import_warmer(("openai",))
+
+
+@st.cache_resource
+def get_model_router() -> ModelRouter:
+    # Shared across sessions so every user's turns feed the latency stats
+    return ModelRouter()
+
+
 # Sidebar settings
 with st.sidebar:
     st.header("Settings")
     model_name = st.selectbox(
         "Select Model",
-        ["gpt-4o", "gpt-4o-mini", "gpt-4.1", "gpt-5.1", "gpt-5-mini"],
-        index=1
+        ["Auto", "gpt-4o", "gpt-4o-mini", "gpt-4.1", "gpt-5.1", "gpt-5-mini"],
+        index=2,
+        help="Auto picks the model predicted to finish a short reply soonest (measured first-token latency plus streaming speed)."
     )
     temperature = st.slider(
         "Temperature",
@@ -49,7 +73,23 @@ with st.sidebar:
     )
     
     reasoning_effort = None
-    if model_name == "gpt-5.1":
+    if model_name == "Auto":
+        quality_floor = st.slider(
+            "Quality floor",
+            min_value=1,
+            max_value=5,
+            value=1,
+            help="Auto only routes to models at or above this quality level (5 = strongest)."
+        )
+        exploration_rate = st.slider(
+            "Exploration rate",
+            min_value=0.0,
+            max_value=0.5,
+            value=0.1,
+            step=0.05,
+            help="Share of turns sent to a random eligible model to keep latency stats fresh."
+        )
+    elif model_name == "gpt-5.1":
         reasoning_effort = st.selectbox(
             "Reasoning Effort",
             ["none", "low", "medium", "high"],
@@ -127,6 +167,8 @@ with st.sidebar:
                     "xi-api-key": el_api_key,
                     "Accept": "application/json",
                 }
+                import requests
+
                 resp = requests.get(
                     "https://api.elevenlabs.io/v1/voices",
                     headers=headers,
@@ -173,6 +215,10 @@ with st.sidebar:
             st.info("Enter API key to select from voice list.")
     else:
         st.info("Enable TTS to configure voice.")
+
+if tts_enabled:
+    get_import_warmer(("websockets.asyncio.client",) if advanced_streaming else ("elevenlabs.client",))
+
 # Initialize OpenAI client
 api_key = os.getenv("OPENAI_API_KEY")
 
@@ -180,8 +226,6 @@ if not api_key:
     st.warning("Please set your OPENAI_API_KEY in the .env file to continue.")
     st.stop()
 
-client = OpenAI(api_key=api_key)
-
 # Initialize chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
@@ -210,25 +254,61 @@ if prompt := st.chat_input("What is up?"):
             ]
         )
 
-        # Prepare API arguments
-        api_args = {
-            "model": model_name,
-            "messages": messages,
-            "temperature": temperature,
-            "stream": True,
-        }
+        # Let the router pick model and reasoning effort for this turn
+        route: Optional[Route] = None
+        if model_name == "Auto":
+            route = get_model_router().choose(quality_floor, exploration_rate)
+            model_name = route.model
+            reasoning_effort = route.reasoning_effort
 
-        # Add reasoning_effort only if applicable
-        if reasoning_effort:
-            api_args["reasoning_effort"] = reasoning_effort
+        # Prepare API arguments
+        def build_api_args(model: str, effort: Optional[str]) -> dict:
+            api_args = {
+                "model": model,
+                "messages": messages,
+                "stream": True,
+            }
+            # Reasoning models reject any temperature other than the default
+            if not effort or effort == "none":
+                api_args["temperature"] = temperature
+            # Add reasoning_effort only if applicable
+            if effort:
+                api_args["reasoning_effort"] = effort
+            return api_args
+
+        # Readiness check: let the background warm-up finish the openai import
+        # rather than racing it; after the first turn this returns immediately
+        get_import_warmer(("openai",)).wait(timeout=10)
+        client = get_openai_client(api_key)
 
         # --- Measure first-token latency while streaming text manually ---
         t_request = time.time()
-        stream = client.chat.completions.create(**api_args)
+        try:
+            stream = client.chat.completions.create(**build_api_args(model_name, reasoning_effort))
+        except Exception:
+            if route is None:
+                raise
+            # Keep Auto away from a model this key can't use and retry once on another
+            router = get_model_router()
+            router.record_failure(route)
+            failed = (route.model, route.reasoning_effort)
+            route = router.choose(quality_floor, exploration_rate, exclude=[failed])
+            model_name = route.model
+            reasoning_effort = route.reasoning_effort
+            t_request = time.time()
+            try:
+                stream = client.chat.completions.create(**build_api_args(model_name, reasoning_effort))
+            except Exception as e:
+                router.record_failure(route)
+                st.error(f"Auto routing failed on two models, please try again: {str(e)}")
+                st.stop()
 
         response_placeholder = st.empty()
         response_text = ""
         first_token_latency = None
+        # Content chunks stand in for tokens (one delta is usually one token)
+        token_count = 0
+        tokens_per_s = None
 
         # Optional: token-level streaming into ElevenLabs Realtime bridge
         text_ws_queue: Optional[queue.Queue] = None
@@ -316,6 +396,9 @@ if prompt := st.chat_input("What is up?"):
             text_ws_queue = queue.Queue()
 
             def _text_ws_worker() -> None:
+                import asyncio
+                import websockets
+
                 async def _run() -> None:
                     uri = f"ws://localhost:8001/ws/text/{session_id}"
                     try:
@@ -359,6 +442,7 @@ if prompt := st.chat_input("What is up?"):
 
             if first_token_latency is None:
                 first_token_latency = time.time() - t_request
+            token_count += 1
 
             response_text += content_delta
             response_placeholder.markdown(response_text)
@@ -374,6 +458,13 @@ if prompt := st.chat_input("What is up?"):
 
         response = response_text
 
+        # Feed measured latency back into the router's decaying stats
+        if route is not None and first_token_latency is not None:
+            generation_time = time.time() - t_request - first_token_latency
+            if token_count > 1 and generation_time > 0:
+                tokens_per_s = (token_count - 1) / generation_time
+            get_model_router().record(route, first_token_latency, tokens_per_s)
+
         # --- Generate TTS and measure / stream audio for non-advanced path ---
         audio_latency = None
         if (
@@ -384,6 +475,9 @@ if prompt := st.chat_input("What is up?"):
             and not advanced_streaming
         ):
             try:
+                # Import before the timer so audio latency excludes import time
+                from elevenlabs.client import ElevenLabs
+
                 t_tts_start = time.time()
                 el_client = ElevenLabs(api_key=el_api_key)
                 audio_result = el_client.text_to_speech.convert(
@@ -408,6 +502,20 @@ if prompt := st.chat_input("What is up?"):
         # --- Show latency metrics under the assistant message ---
         if first_token_latency is not None:
             latency_text = f"First token latency: {first_token_latency*1000:.0f} ms"
+            if route is not None:
+                model_label = model_name + (f" ({reasoning_effort})" if reasoning_effort else "")
+                if route.predicted_ttft is not None:
+                    predicted = f"predicted {route.predicted_ttft*1000:.0f} ms"
+                else:
+                    predicted = "no prediction yet"
+                latency_text = (
+                    f"Auto → {model_label}{' (exploring)' if route.explored else ''} • "
+                    f"{latency_text} ({predicted})"
+                )
+                if tokens_per_s is not None:
+                    latency_text += f" • ~{tokens_per_s:.0f} tok/s"
+                    if route.predicted_tokens_per_s is not None:
+                        latency_text += f" (predicted {route.predicted_tokens_per_s:.0f})"
             if audio_latency is not None:
                 latency_text += f" • Audio ready latency: {audio_latency*1000:.0f} ms"
             st.caption(latency_text)
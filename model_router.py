@@ -0,0 +1,140 @@
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+Candidate = Tuple[str, Optional[str]]
+
+# (model, reasoning_effort) pairs the router may pick from, with a rough
+# quality score (1 = lightest, 5 = strongest) used for the quality floor
+CANDIDATES: Dict[Candidate, int] = {
+    ("gpt-4o-mini", None): 1,
+    ("gpt-5-mini", "minimal"): 2,
+    ("gpt-4o", None): 3,
+    ("gpt-4.1", None): 3,
+    ("gpt-5.1", "none"): 4,
+    ("gpt-5.1", "low"): 5,
+}
+
+# Tutoring replies are 2-3 short sentences; used to weigh throughput against TTFT
+REPLY_TOKENS = 60
+
+# How long a candidate whose request failed is kept out of rotation; doubles
+# with each consecutive failure up to FAILURE_COOLDOWN_MAX
+FAILURE_COOLDOWN = 300.0
+FAILURE_COOLDOWN_MAX = 3600.0
+
+
+@dataclass
+class LatencyStats:
+    """Exponentially decaying TTFT and throughput estimates for one candidate."""
+
+    ttft: Optional[float] = None
+    tokens_per_s: Optional[float] = None
+    samples: int = 0
+    failures: int = 0
+    failed_until: float = 0.0
+
+    def update(self, ttft: float, tokens_per_s: Optional[float], decay: float) -> None:
+        self.ttft = ttft if self.ttft is None else decay * self.ttft + (1 - decay) * ttft
+        if tokens_per_s is not None:
+            if self.tokens_per_s is None:
+                self.tokens_per_s = tokens_per_s
+            else:
+                self.tokens_per_s = decay * self.tokens_per_s + (1 - decay) * tokens_per_s
+        self.samples += 1
+        self.failures = 0
+        self.failed_until = 0.0
+
+    def fail(self) -> None:
+        self.failures += 1
+        cooldown = min(FAILURE_COOLDOWN * 2 ** (self.failures - 1), FAILURE_COOLDOWN_MAX)
+        self.failed_until = time.time() + cooldown
+
+    def unseen(self) -> bool:
+        # A candidate that only ever failed has been tried; it is not explored first
+        return self.ttft is None and self.failures == 0
+
+    def cooling_down(self) -> bool:
+        return time.time() < self.failed_until
+
+    def predicted_reply_time(self, reply_tokens: int) -> Optional[float]:
+        """Predicted seconds until a reply of ``reply_tokens`` has streamed."""
+
+        if self.ttft is None:
+            return None
+        if not self.tokens_per_s:
+            return self.ttft
+        return self.ttft + reply_tokens / self.tokens_per_s
+
+
+@dataclass
+class Route:
+    """The router's pick for one turn."""
+
+    model: str
+    reasoning_effort: Optional[str]
+    predicted_ttft: Optional[float]
+    predicted_tokens_per_s: Optional[float]
+    explored: bool
+
+
+class ModelRouter:
+    """Routes each turn to the fastest candidate that meets a quality floor.
+
+    "Fastest" is the lowest predicted time to stream a short reply: TTFT
+    plus ``REPLY_TOKENS`` at the measured throughput. Latency statistics are
+    shared by every chat session in the process and updated from the
+    streaming loop after each reply. With probability ``exploration`` a
+    random eligible candidate is tried instead so the estimates for
+    slower-looking models do not go stale. Candidates whose request failed
+    sit out a cooldown that grows with consecutive failures.
+    """
+
+    def __init__(self, decay: float = 0.8) -> None:
+        self.decay = decay
+        self.stats: Dict[Candidate, LatencyStats] = {
+            key: LatencyStats() for key in CANDIDATES
+        }
+        self.lock = threading.Lock()
+
+    def eligible(self, quality_floor: int, exclude: Sequence[Candidate] = ()) -> List[Candidate]:
+        allowed = [key for key in CANDIDATES if key not in exclude]
+        keys = [key for key in allowed if CANDIDATES[key] >= quality_floor]
+        # Never leave the router without a choice
+        keys = keys or [max(allowed, key=CANDIDATES.get)]
+        healthy = [key for key in keys if not self.stats[key].cooling_down()]
+        # If everything is failing, retry whichever cooldown ends first
+        return healthy or [min(keys, key=lambda k: self.stats[k].failed_until)]
+
+    def choose(
+        self, quality_floor: int, exploration: float = 0.1, exclude: Sequence[Candidate] = ()
+    ) -> Route:
+        with self.lock:
+            keys = self.eligible(quality_floor, exclude)
+            unseen = [key for key in keys if self.stats[key].unseen()]
+            if unseen:
+                key, explored = random.choice(unseen), True
+            elif random.random() < exploration:
+                key, explored = random.choice(keys), True
+            else:
+                # Candidates that never produced a reply rank after measured ones
+                key = min(
+                    keys,
+                    key=lambda k: (
+                        self.stats[k].ttft is None,
+                        self.stats[k].predicted_reply_time(REPLY_TOKENS) or 0.0,
+                    ),
+                )
+                explored = False
+            stats = self.stats[key]
+            return Route(key[0], key[1], stats.ttft, stats.tokens_per_s, explored)
+
+    def record(self, route: Route, ttft: float, tokens_per_s: Optional[float]) -> None:
+        with self.lock:
+            self.stats[(route.model, route.reasoning_effort)].update(ttft, tokens_per_s, self.decay)
+
+    def record_failure(self, route: Route) -> None:
+        with self.lock:
+            self.stats[(route.model, route.reasoning_effort)].fail()
@@ -2,19 +2,64 @@ import asyncio
 import json
 import base64
 import logging
-from typing import Dict, Optional, Set
+import os
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from elevenlabs.client import ElevenLabs
 import websockets
 from websockets.exceptions import ConnectionClosed
 
+from warmup import ImportWarmer
+
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Realtime TTS Bridge")
+# Upstream ElevenLabs WebSocket base URL (override to point at a local fake server)
+ELEVEN_WS_BASE = os.getenv("ELEVEN_WS_BASE", "wss://api.elevenlabs.io")
+
+# Multiplex many sessions over one upstream socket per (api_key, voice, model)
+# using the multi-context stream-input protocol instead of one socket per session
+MULTIPLEX = os.getenv("ELEVEN_MULTIPLEX", "false").lower() == "true"
+
+# ElevenLabs caps concurrent contexts per connection; extra sessions open another socket
+MAX_CONTEXTS_PER_SOCKET = int(os.getenv("ELEVEN_MAX_CONTEXTS_PER_SOCKET", "5"))
+
+# How long to wait for the final audio of a closed context before freeing its slot
+CONTEXT_FINAL_TIMEOUT = 30.0
+
+# Give up on a multiplexed turn whose text stalls, so it frees its context slot
+# (ElevenLabs drops contexts idle for 20 s by default anyway)
+TEXT_IDLE_TIMEOUT = 20.0
+
+# Close a pooled upstream socket left without contexts for this long,
+# before ElevenLabs drops it for inactivity
+SOCKET_IDLE_GRACE = 10.0
+
+VOICE_SETTINGS = {
+    "stability": 0.5,
+    "similarity_boost": 0.8,
+}
+
+# websockets loads its asyncio client on the first upstream connect; warm it so
+# the first realtime turn doesn't pay for it. /ready gates on this warmer only.
+warmer = ImportWarmer(["websockets.asyncio.client"])
+
+# The ElevenLabs SDK is only needed by the legacy /tts route; warmed but not gated on
+legacy_warmer = ImportWarmer(["elevenlabs.client"])
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmer.start()
+    legacy_warmer.start()
+    yield
+
+
+app = FastAPI(title="Realtime TTS Bridge", lifespan=lifespan)
 
 # Allow local dev from Streamlit frontend and browser
 app.add_middleware(
@@ -70,6 +115,87 @@ def get_session(session_id: str, cfg: Optional[SessionConfig] = None) -> Session
     return state
 
 
+async def broadcast_audio(state: SessionState, audio_bytes: bytes) -> None:
+    """Fan out an audio chunk to all connected browser audio clients."""
+
+    for client in list(state.audio_clients):
+        try:
+            await client.send_bytes(audio_bytes)
+        except Exception as e:
+            logger.error(f"Error sending to client: {e}")
+            try:
+                await client.close()
+            except Exception:
+                pass
+            state.audio_clients.discard(client)
+
+
+def decode_audio(data: dict) -> Optional[bytes]:
+    """Return the decoded audio chunk of an ElevenLabs frame, or None."""
+
+    # ElevenLabs returns audio in base64 under "audio" key
+    audio_b64 = data.get("audio")
+    if not audio_b64:
+        # Check for errors
+        if "error" in data:
+            logger.error(f"ElevenLabs error: {data['error']}")
+        return None
+
+    try:
+        audio_bytes = base64.b64decode(audio_b64)
+        logger.debug(f"Received audio chunk: {len(audio_bytes)} bytes")
+    except Exception as e:
+        logger.error(f"Error decoding audio: {e}")
+        return None
+    return audio_bytes
+
+
+async def pump_text(
+    state: SessionState,
+    send: Callable[[dict], Awaitable[None]],
+    idle_timeout: Optional[float] = None,
+) -> None:
+    """Buffer text from state.text_queue into sentence-like chunks before sending.
+
+    Returns once an "end" message arrives and any remaining buffered text
+    has been passed to ``send``. With ``idle_timeout``, raises
+    asyncio.TimeoutError if no message arrives for that long.
+    """
+
+    text_buffer = ""
+    sentence_endings = ".!?;:"
+
+    while True:
+        msg = await asyncio.wait_for(state.text_queue.get(), idle_timeout)
+        msg_type = msg.get("type")
+        logger.debug(f"Text pump received: {msg_type}")
+
+        if msg_type == "end":
+            # Send any remaining buffered text
+            if text_buffer.strip():
+                await send({"text": text_buffer, "try_trigger_generation": True})
+                logger.debug(f"Sent final buffered text: {text_buffer[:50]}...")
+            return
+        elif msg_type == "text_delta":
+            text = msg.get("text") or ""
+            if not text:
+                continue
+
+            text_buffer += text
+
+            # Check if we have a sentence ending or buffer is large enough
+            should_send = False
+            if any(end in text_buffer for end in sentence_endings):
+                should_send = True
+            elif len(text_buffer) > 100:  # Send if buffer gets too large
+                should_send = True
+
+            if should_send:
+                await send({"text": text_buffer, "try_trigger_generation": True})
+                logger.debug(f"Sent buffered text ({len(text_buffer)} chars): {text_buffer[:50]}...")
+                text_buffer = ""
+
+
 async def run_eleven_realtime(state: SessionState) -> None:
     """Maintain a Realtime WS session with ElevenLabs for this state.
 
@@ -86,7 +212,7 @@ async def run_eleven_realtime(state: SessionState) -> None:
     output_format = "pcm_24000"
     
     url = (
-        f"wss://api.elevenlabs.io/v1/text-to-speech/{state.cfg.voice_id}/stream-input"
+        f"{ELEVEN_WS_BASE}/v1/text-to-speech/{state.cfg.voice_id}/stream-input"
         f"?model_id={state.cfg.model_id}&output_format={output_format}"
     )
     headers = {"xi-api-key": state.cfg.api_key}
@@ -100,57 +226,23 @@ async def run_eleven_realtime(state: SessionState) -> None:
             # Send BOS (beginning of stream) message
             bos_msg = {
                 "text": " ",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.8,
-                },
+                "voice_settings": VOICE_SETTINGS,
                 "xi_api_key": state.cfg.api_key,
             }
             await ws.send(json.dumps(bos_msg))
             logger.debug("Sent BOS message")
 
+            async def send_text(payload: dict) -> None:
+                await ws.send(json.dumps(payload))
+
             async def text_pump() -> None:
-                """Buffer text into sentence-like chunks before sending."""
-                text_buffer = ""
-                sentence_endings = ".!?;:"
-                
-                while True:
-                    msg = await state.text_queue.get()
-                    msg_type = msg.get("type")
-                    logger.debug(f"Text pump received: {msg_type}")
-                    
-                    if msg_type == "end":
-                        # Send any remaining buffered text
-                        if text_buffer.strip():
-                            payload = {"text": text_buffer, "try_trigger_generation": True}
-                            await ws.send(json.dumps(payload))
-                            logger.debug(f"Sent final buffered text: {text_buffer[:50]}...")
-                        # Send EOS (end of stream) message
-                        try:
-                            await ws.send(json.dumps({"text": ""}))
-                            logger.debug("Sent EOS message")
-                        except Exception as e:
-                            logger.error(f"Error sending EOS: {e}")
-                        break
-                    elif msg_type == "text_delta":
-                        text = msg.get("text") or ""
-                        if not text:
-                            continue
-                        
-                        text_buffer += text
-                        
-                        # Check if we have a sentence ending or buffer is large enough
-                        should_send = False
-                        if any(end in text_buffer for end in sentence_endings):
-                            should_send = True
-                        elif len(text_buffer) > 100:  # Send if buffer gets too large
-                            should_send = True
-                        
-                        if should_send:
-                            payload = {"text": text_buffer, "try_trigger_generation": True}
-                            await ws.send(json.dumps(payload))
-                            logger.debug(f"Sent buffered text ({len(text_buffer)} chars): {text_buffer[:50]}...")
-                            text_buffer = ""
+                await pump_text(state, send_text)
+                # Send EOS (end of stream) message
+                try:
+                    await ws.send(json.dumps({"text": ""}))
+                    logger.debug("Sent EOS message")
+                except Exception as e:
+                    logger.error(f"Error sending EOS: {e}")
 
             async def audio_pump() -> None:
                 logger.info("Audio pump started")
@@ -159,33 +251,10 @@ async def run_eleven_realtime(state: SessionState) -> None:
                         data = json.loads(raw)
                     except Exception:
                         continue
-                    
-                    # ElevenLabs returns audio in base64 under "audio" key
-                    audio_b64 = data.get("audio")
-                    if not audio_b64:
-                        # Check for errors
-                        if "error" in data:
-                            logger.error(f"ElevenLabs error: {data['error']}")
-                        continue
-                    
-                    try:
-                        audio_bytes = base64.b64decode(audio_b64)
-                        logger.debug(f"Received audio chunk: {len(audio_bytes)} bytes")
-                    except Exception as e:
-                        logger.error(f"Error decoding audio: {e}")
-                        continue
-                    
-                    # Fan out to all connected browser audio clients
-                    for client in list(state.audio_clients):
-                        try:
-                            await client.send_bytes(audio_bytes)
-                        except Exception as e:
-                            logger.error(f"Error sending to client: {e}")
-                            try:
-                                await client.close()
-                            except Exception:
-                                pass
-                            state.audio_clients.discard(client)
+
+                    audio_bytes = decode_audio(data)
+                    if audio_bytes is not None:
+                        await broadcast_audio(state, audio_bytes)
 
             await asyncio.gather(text_pump(), audio_pump())
     except ConnectionClosed as e:
@@ -196,6 +265,211 @@ async def run_eleven_realtime(state: SessionState) -> None:
         return
 
 
+UpstreamKey = Tuple[str, str, str]
+
+
+class UpstreamMux:
+    """One multi-context ElevenLabs socket shared by many sessions.
+
+    Each session runs as a context whose ID is its session_id. Audio frames
+    are routed back to that session's audio clients by context ID.
+
+    Uses ElevenLabs multi-context WebSocket API:
+    wss://api.elevenlabs.io/v1/text-to-speech/{voice_id}/multi-stream-input?model_id={model_id}
+    """
+
+    def __init__(self, key: UpstreamKey) -> None:
+        self.key = key
+        self.ws: Optional[websockets.ClientConnection] = None
+        self.contexts: Dict[str, SessionState] = {}
+        self.finals: Dict[str, asyncio.Event] = {}
+        self.reader_task: Optional[asyncio.Task] = None
+        self.idle_task: Optional[asyncio.Task] = None
+        # Set once connect() has finished, whether or not it succeeded
+        self.connected = asyncio.Event()
+        self.closed = False
+
+    async def connect(self) -> None:
+        api_key, voice_id, model_id = self.key
+        url = (
+            f"{ELEVEN_WS_BASE}/v1/text-to-speech/{voice_id}/multi-stream-input"
+            f"?model_id={model_id}&output_format=pcm_24000"
+        )
+        logger.info(f"Connecting multi-context upstream: {url}")
+        self.ws = await websockets.connect(url, additional_headers={"xi-api-key": api_key})
+        self.reader_task = asyncio.create_task(self.audio_demux())
+
+    def has_capacity(self) -> bool:
+        return not self.closed and len(self.contexts) < MAX_CONTEXTS_PER_SOCKET
+
+    def attach(self, state: SessionState) -> None:
+        if self.idle_task is not None:
+            self.idle_task.cancel()
+            self.idle_task = None
+        self.contexts[state.session_id] = state
+        self.finals[state.session_id] = asyncio.Event()
+
+    def detach(self, context_id: str) -> None:
+        self.contexts.pop(context_id, None)
+        self.finals.pop(context_id, None)
+        if not self.contexts and not self.closed and self.idle_task is None:
+            self.idle_task = asyncio.create_task(self.close_when_idle())
+
+    def discard(self) -> None:
+        """Stop handing out this socket to new turns."""
+
+        self.closed = True
+        pool = upstreams.get(self.key, [])
+        if self in pool:
+            pool.remove(self)
+
+    async def close_when_idle(self) -> None:
+        await asyncio.sleep(SOCKET_IDLE_GRACE)
+        if self.contexts or self.closed:
+            return
+        # Discard before awaiting so acquire_upstream never picks a closing socket
+        self.discard()
+        logger.info("Closing idle multi-context upstream")
+        try:
+            await self.send({"close_socket": True})
+            await self.ws.close()
+        except ConnectionClosed:
+            pass
+
+    async def send(self, payload: dict) -> None:
+        await self.ws.send(json.dumps(payload))
+
+    async def open_context(self, context_id: str) -> None:
+        await self.send({"text": " ", "voice_settings": VOICE_SETTINGS, "context_id": context_id})
+        logger.debug(f"Opened context {context_id}")
+
+    async def close_context(self, context_id: str) -> None:
+        """Flush and close a context, then wait for its final audio.
+
+        A context closed while flushing keeps flushing, and upstream marks
+        its last frame with isFinal, so the slot is only freed after that.
+        """
+
+        if self.closed:
+            return
+        await self.send({"context_id": context_id, "flush": True})
+        await self.send({"context_id": context_id, "close_context": True})
+        final = self.finals.get(context_id)
+        if final is not None:
+            try:
+                await asyncio.wait_for(final.wait(), CONTEXT_FINAL_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning(f"No final audio for context {context_id}, freeing it anyway")
+        logger.debug(f"Closed context {context_id}")
+
+    async def audio_demux(self) -> None:
+        """Route upstream audio frames to sessions by context ID."""
+
+        try:
+            async for raw in self.ws:
+                try:
+                    data = json.loads(raw)
+                except Exception:
+                    continue
+
+                context_id = data.get("contextId") or data.get("context_id")
+                state = self.contexts.get(context_id)
+                audio_bytes = decode_audio(data)
+                if state is None:
+                    continue
+                if audio_bytes is not None:
+                    await broadcast_audio(state, audio_bytes)
+                if data.get("isFinal"):
+                    self.finals[context_id].set()
+        except ConnectionClosed as e:
+            logger.warning(f"Multi-context upstream closed: {e}")
+        except Exception as e:
+            logger.error(f"Multi-context upstream error: {e}", exc_info=True)
+        finally:
+            self.discard()
+            # Release any turns still waiting on this socket
+            for event in self.finals.values():
+                event.set()
+
+
+upstreams: Dict[UpstreamKey, List[UpstreamMux]] = {}
+
+
+async def acquire_upstream(state: SessionState) -> UpstreamMux:
+    """Attach a session to a shared upstream socket, opening one if all are full.
+
+    Picking a socket and reserving the slot happen without awaiting, so the
+    cap holds without a lock. A new socket joins the pool before it has
+    connected: sessions that land on it wait for that one handshake only,
+    and handshakes for different sockets run concurrently.
+    """
+
+    key = (state.cfg.api_key, state.cfg.voice_id, state.cfg.model_id)
+    pool = upstreams.setdefault(key, [])
+    mux = next((m for m in pool if m.has_capacity()), None)
+    opener = mux is None
+    if opener:
+        mux = UpstreamMux(key)
+        pool.append(mux)
+    mux.attach(state)
+
+    if opener:
+        try:
+            await mux.connect()
+        except Exception:
+            mux.discard()
+            mux.detach(state.session_id)
+            raise
+        finally:
+            mux.connected.set()
+    else:
+        await mux.connected.wait()
+
+    if mux.ws is None:
+        mux.detach(state.session_id)
+        raise ConnectionError("Multi-context upstream failed to connect")
+    return mux
+
+
+async def run_eleven_multiplexed(state: SessionState) -> None:
+    """Run this session's turn as a context on a shared upstream socket.
+
+    The context is opened when the turn starts and closed once its final
+    audio has arrived, leaving the socket open for other sessions.
+    """
+
+    mux: Optional[UpstreamMux] = None
+    context_id = state.session_id
+    try:
+        mux = await acquire_upstream(state)
+        try:
+            await mux.open_context(context_id)
+        except ConnectionClosed:
+            # The pooled socket died before its reader noticed; retry once on a fresh one
+            mux.discard()
+            mux.detach(context_id)
+            mux = await acquire_upstream(state)
+            await mux.open_context(context_id)
+
+        async def send_text(payload: dict) -> None:
+            await mux.send({"text": payload["text"], "context_id": context_id})
+
+        try:
+            await pump_text(state, send_text, idle_timeout=TEXT_IDLE_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.warning(f"No text for context {context_id} in {TEXT_IDLE_TIMEOUT:.0f} s, closing it")
+        await mux.close_context(context_id)
+    except ConnectionClosed as e:
+        logger.warning(f"ElevenLabs connection closed: {e}")
+    except Exception as e:
+        logger.error(f"ElevenLabs WS error: {e}", exc_info=True)
+    finally:
+        if mux is not None:
+            mux.detach(context_id)
+        # Turns are one-shot sessions; drop them once the context is done
+        sessions.pop(context_id, None)
+
+
 @app.websocket("/ws/text/{session_id}")
 async def text_ws(websocket: WebSocket, session_id: str) -> None:
     """WebSocket endpoint for backend (Streamlit) to push text deltas.
@@ -211,6 +485,7 @@ async def text_ws(websocket: WebSocket, session_id: str) -> None:
     await websocket.accept()
     cfg: Optional[SessionConfig] = None
     state: Optional[SessionState] = None
+    ended = False
     try:
         # First message must be config
         first = await websocket.receive_text()
@@ -223,7 +498,8 @@ async def text_ws(websocket: WebSocket, session_id: str) -> None:
         )
         state = get_session(session_id, cfg)
         if state.eleven_task is None:
-            state.eleven_task = asyncio.create_task(run_eleven_realtime(state))
+            runner = run_eleven_multiplexed if MULTIPLEX else run_eleven_realtime
+            state.eleven_task = asyncio.create_task(runner(state))
 
         # Forward all subsequent text messages into the session queue
         while True:
@@ -231,12 +507,16 @@ async def text_ws(websocket: WebSocket, session_id: str) -> None:
             obj = json.loads(msg)
             await state.text_queue.put(obj)
             if obj.get("type") == "end":
+                ended = True
                 break
     except WebSocketDisconnect:
         pass
     except Exception:
         pass
     finally:
+        # End the turn if the backend dropped mid-stream so the runner finishes
+        if state is not None and not ended:
+            await state.text_queue.put({"type": "end"})
         try:
             await websocket.close()
         except Exception:
@@ -270,10 +550,13 @@ async def audio_ws(websocket: WebSocket, session_id: str) -> None:
         while True:
             try:
                 # Wait for any message (ping/pong) or disconnect
-                await asyncio.wait_for(websocket.receive(), timeout=60)
+                msg = await asyncio.wait_for(websocket.receive(), timeout=60)
             except asyncio.TimeoutError:
                 # Send a ping to keep alive
                 continue
+            if msg["type"] == "websocket.disconnect":
+                logger.info(f"Audio WS disconnected for session {session_id}")
+                break
     except WebSocketDisconnect:
         logger.info(f"Audio WS disconnected for session {session_id}")
     finally:
@@ -284,6 +567,26 @@ async def audio_ws(websocket: WebSocket, session_id: str) -> None:
             pass
 
 
+@app.get("/ready")
+async def ready() -> JSONResponse:
+    """Readiness probe: 503 until the realtime path's lazy imports are warmed.
+
+    The legacy /tts SDK warm-up is reported but does not affect readiness.
+    """
+
+    # Snapshot: the warm-up threads may still be writing these dicts
+    timings = {**warmer.timings, **legacy_warmer.timings}
+    errors = {**warmer.errors, **legacy_warmer.errors}
+    return JSONResponse(
+        {
+            "ready": warmer.ready(),
+            "imports_ms": {name: round(t * 1000) for name, t in timings.items()},
+            "errors": errors,
+        },
+        status_code=200 if warmer.ready() else 503,
+    )
+
+
 @app.post("/tts")
 async def start_tts(req: TTSRequest) -> dict:
     """Legacy HTTP streaming TTS using ElevenLabs SDK.
@@ -292,6 +595,8 @@ async def start_tts(req: TTSRequest) -> dict:
     in the true token-level streaming path.
     """
 
+    from elevenlabs.client import ElevenLabs
+
     client = ElevenLabs(api_key=req.api_key)
     # Consume the iterator to trigger generation; caller does not use audio here.
     _ = list(
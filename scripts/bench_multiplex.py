@@ -0,0 +1,201 @@
+"""Benchmark the realtime bridge against a local fake ElevenLabs server.
+
+Runs N concurrent talkers through the bridge once with one upstream socket
+per session and once with the multi-context multiplexer, then reports
+upstream sockets, traced memory and time to first audio for each mode.
+
+Usage:
+    python scripts/bench_multiplex.py --sessions 100 --contexts-per-socket 25
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import logging
+import os
+import socket
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+from typing import Dict, List
+
+import uvicorn
+import websockets
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import realtime_bridge  # noqa: E402
+
+# Simulated upstream synthesis delay and audio per text chunk
+FAKE_TTFA = 0.05
+FRAMES_PER_CHUNK = 3
+FRAME = base64.b64encode(b"\x00\x00" * 1200).decode("ascii")
+
+TURN_TEXT = ["Hello ", "there", "! ", "How are ", "you today", "? ", "Let's ", "practice ", "English."]
+
+
+class FakeElevenLabs:
+    """Minimal stand-in for the stream-input and multi-stream-input endpoints."""
+
+    def __init__(self) -> None:
+        self.open_sockets = 0
+        self.peak_sockets = 0
+        self.total_sockets = 0
+
+    async def handler(self, ws) -> None:
+        self.open_sockets += 1
+        self.total_sockets += 1
+        self.peak_sockets = max(self.peak_sockets, self.open_sockets)
+        try:
+            if "multi-stream-input" in ws.request.path:
+                await self.serve_multi(ws)
+            else:
+                await self.serve_single(ws)
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.open_sockets -= 1
+
+    async def synthesize(self, ws, extra: dict) -> None:
+        await asyncio.sleep(FAKE_TTFA)
+        for _ in range(FRAMES_PER_CHUNK):
+            await ws.send(json.dumps({"audio": FRAME, **extra}))
+
+    async def serve_single(self, ws) -> None:
+        pending: List[asyncio.Task] = []
+        async for raw in ws:
+            msg = json.loads(raw)
+            text = msg.get("text")
+            if text == "":
+                await asyncio.gather(*pending)
+                await ws.send(json.dumps({"isFinal": True}))
+                return
+            if text and text.strip():
+                pending.append(asyncio.create_task(self.synthesize(ws, {})))
+
+    async def serve_multi(self, ws) -> None:
+        # Mirrors the documented protocol: flush only forces generation,
+        # isFinal is sent once a closed context has finished flushing.
+        pending: Dict[str, List[asyncio.Task]] = {}
+        async for raw in ws:
+            msg = json.loads(raw)
+            ctx = msg.get("context_id")
+            text = msg.get("text")
+            if msg.get("close_socket"):
+                await asyncio.gather(*(t for tasks in pending.values() for t in tasks))
+                await ws.close()
+                return
+            elif msg.get("close_context"):
+                tasks = pending.pop(ctx, [])
+
+                async def finish(ctx: str = ctx, tasks: List[asyncio.Task] = tasks) -> None:
+                    await asyncio.gather(*tasks)
+                    await ws.send(json.dumps({"contextId": ctx, "isFinal": True}))
+
+                asyncio.create_task(finish())
+            elif msg.get("flush"):
+                continue
+            elif text and text.strip():
+                task = asyncio.create_task(self.synthesize(ws, {"contextId": ctx}))
+                pending.setdefault(ctx, []).append(task)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def talker(bridge: str) -> float:
+    """Run one turn through the bridge and return time to first audio."""
+
+    session_id = str(uuid.uuid4())
+    async with websockets.connect(f"{bridge}/ws/text/{session_id}") as text_ws:
+        cfg = {"api_key": "fake", "voice_id": "voice", "model_id": "eleven_flash_v2_5"}
+        await text_ws.send(json.dumps(cfg))
+        async with websockets.connect(f"{bridge}/ws/audio/{session_id}") as audio_ws:
+            t_start = time.perf_counter()
+            for delta in TURN_TEXT:
+                await text_ws.send(json.dumps({"type": "text_delta", "text": delta}))
+            await text_ws.send(json.dumps({"type": "end"}))
+
+            await audio_ws.recv()
+            ttfa = time.perf_counter() - t_start
+            # Drain the rest of the turn's audio
+            try:
+                while True:
+                    await asyncio.wait_for(audio_ws.recv(), timeout=0.5)
+            except asyncio.TimeoutError:
+                pass
+    return ttfa
+
+
+async def run_mode(bridge: str, fake: FakeElevenLabs, sessions: int, multiplex: bool) -> dict:
+    realtime_bridge.MULTIPLEX = multiplex
+    fake.peak_sockets = fake.open_sockets
+    fake.total_sockets = 0
+    tracemalloc.reset_peak()
+    base_mem, _ = tracemalloc.get_traced_memory()
+
+    t_start = time.perf_counter()
+    ttfas = await asyncio.gather(*(talker(bridge) for _ in range(sessions)))
+    wall = time.perf_counter() - t_start
+
+    _, peak_mem = tracemalloc.get_traced_memory()
+    ttfas_ms = sorted(t * 1000 for t in ttfas)
+    return {
+        "mode": "multiplex" if multiplex else "per-session",
+        "upstream_opened": fake.total_sockets,
+        "upstream_peak": fake.peak_sockets,
+        "mem_peak_kb": (peak_mem - base_mem) / 1024,
+        "ttfa_p50_ms": statistics.median(ttfas_ms),
+        "ttfa_p95_ms": ttfas_ms[int(len(ttfas_ms) * 0.95) - 1],
+        "wall_s": wall,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    fake = FakeElevenLabs()
+    upstream = await websockets.serve(fake.handler, "127.0.0.1", 0)
+    upstream_port = upstream.sockets[0].getsockname()[1]
+    realtime_bridge.ELEVEN_WS_BASE = f"ws://127.0.0.1:{upstream_port}"
+    realtime_bridge.MAX_CONTEXTS_PER_SOCKET = args.contexts_per_socket
+
+    bridge_port = free_port()
+    server = uvicorn.Server(
+        uvicorn.Config(realtime_bridge.app, host="127.0.0.1", port=bridge_port, log_level="warning")
+    )
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    bridge = f"ws://127.0.0.1:{bridge_port}"
+    tracemalloc.start()
+    results = [
+        await run_mode(bridge, fake, args.sessions, multiplex=False),
+        await run_mode(bridge, fake, args.sessions, multiplex=True),
+    ]
+    tracemalloc.stop()
+
+    print(f"{args.sessions} concurrent sessions, {args.contexts_per_socket} contexts per socket")
+    print(f"{'mode':<12} {'opened':>7} {'peak':>5} {'mem KB':>9} {'p50 ms':>8} {'p95 ms':>8} {'wall s':>7}")
+    for r in results:
+        print(
+            f"{r['mode']:<12} {r['upstream_opened']:>7} {r['upstream_peak']:>5} {r['mem_peak_kb']:>9.0f} "
+            f"{r['ttfa_p50_ms']:>8.1f} {r['ttfa_p95_ms']:>8.1f} {r['wall_s']:>7.2f}"
+        )
+
+    server.should_exit = True
+    await server_task
+    upstream.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--contexts-per-socket", type=int, default=realtime_bridge.MAX_CONTEXTS_PER_SOCKET)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(main(args))
@@ -0,0 +1,162 @@
+"""Measure import time and startup latency of the app and realtime bridge.
+
+Parses ``python -X importtime`` output to report the per-module cost of
+app.py's top-level imports and of ``import realtime_bridge``, then starts
+the bridge under uvicorn and times how long /ready takes to return 200.
+Exits non-zero when any measurement exceeds its budget, so it can gate CI
+or a container build.
+
+Usage:
+    python scripts/bench_startup.py --bridge-budget-ms 600
+"""
+
+import argparse
+import ast
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def app_imports() -> str:
+    """Return app.py's module-level import statements as a script."""
+
+    with open(os.path.join(ROOT, "app.py"), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(
+        ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    )
+
+
+def importtime(code: str, expand: Optional[str] = None) -> Dict[str, int]:
+    """Run ``code`` under -X importtime and return top-level cumulative cost in us.
+
+    When ``expand`` names a top-level module, its direct imports are
+    reported in its place, with the remainder attributed to the module itself.
+    """
+
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Import failed:\n{proc.stderr[-2000:]}")
+
+    costs: Dict[str, int] = {}
+    children: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        # Nested imports are indented below the package that pulled them in,
+        # and are listed before it
+        depth = len(name) - len(name.lstrip())
+        if depth == 3:
+            children[name.strip()] = int(cumulative)
+        elif depth == 1:
+            if name.strip() == expand:
+                costs.update(children)
+                costs[f"{expand} (self)"] = int(cumulative) - sum(children.values())
+            else:
+                costs[name.strip()] = int(cumulative)
+            children = {}
+    return costs
+
+
+def measure_imports(code: str, repeat: int, expand: Optional[str] = None) -> List[Tuple[str, int]]:
+    """Return per-module costs from the fastest of ``repeat`` runs."""
+
+    # Modules the interpreter imports on its own are not ours to budget
+    baseline = set(importtime("pass"))
+    runs = []
+    for _ in range(repeat):
+        costs = {name: us for name, us in importtime(code, expand).items() if name not in baseline}
+        runs.append(costs)
+    best = min(runs, key=lambda costs: sum(costs.values()))
+    return sorted(best.items(), key=lambda item: item[1], reverse=True)
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_bridge_ready(timeout: float) -> Tuple[float, float]:
+    """Start the bridge and return seconds until it listens and until /ready is 200."""
+
+    port = free_port()
+    t_start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "realtime_bridge:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    listening = None
+    try:
+        while time.perf_counter() - t_start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=1) as resp:
+                    if resp.status == 200:
+                        elapsed = time.perf_counter() - t_start
+                        return listening or elapsed, elapsed
+            except urllib.error.HTTPError as e:
+                if e.code == 503 and listening is None:
+                    listening = time.perf_counter() - t_start
+            except (urllib.error.URLError, ConnectionError):
+                pass
+            if proc.poll() is not None:
+                raise RuntimeError("Bridge exited during startup")
+            time.sleep(0.02)
+        raise RuntimeError(f"Bridge not ready after {timeout:.0f} s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def report(label: str, costs: List[Tuple[str, int]], budget_ms: float, top: int) -> bool:
+    total_ms = sum(us for _, us in costs) / 1000
+    ok = total_ms <= budget_ms
+    print(f"{label}: {total_ms:.0f} ms (budget {budget_ms:.0f} ms){'' if ok else '  OVER BUDGET'}")
+    for name, us in costs[:top]:
+        print(f"  {us / 1000:>8.1f} ms  {name}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-budget-ms", type=float, default=800)
+    parser.add_argument("--bridge-budget-ms", type=float, default=700)
+    parser.add_argument("--ready-budget-ms", type=float, default=2500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    ok = report("app.py imports", measure_imports(app_imports(), args.repeat), args.app_budget_ms, args.top)
+    bridge_costs = measure_imports("import realtime_bridge", args.repeat, expand="realtime_bridge")
+    ok &= report("realtime_bridge import", bridge_costs, args.bridge_budget_ms, args.top)
+
+    listening, ready = measure_bridge_ready(timeout=30)
+    ready_ok = ready * 1000 <= args.ready_budget_ms
+    print(
+        f"bridge startup: listening after {listening * 1000:.0f} ms, ready after {ready * 1000:.0f} ms "
+        f"(budget {args.ready_budget_ms:.0f} ms){'' if ready_ok else '  OVER BUDGET'}"
+    )
+    ok &= ready_ok
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
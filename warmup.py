@@ -0,0 +1,47 @@
+import importlib
+import logging
+import threading
+import time
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class ImportWarmer:
+    """Imports heavy optional modules on a background thread.
+
+    Code paths still import these modules lazily where they are used; the
+    warmer just gets the import done while the app is idle so the first
+    real request finds them in ``sys.modules``. A module that fails to
+    import is recorded in ``errors`` and left for the real code path to
+    report.
+    """
+
+    def __init__(self, modules: List[str]) -> None:
+        self.modules = modules
+        self.timings: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+        self.done = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="import-warmer", daemon=True)
+
+    def start(self) -> "ImportWarmer":
+        self.thread.start()
+        return self
+
+    def run(self) -> None:
+        for name in self.modules:
+            t_start = time.perf_counter()
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                self.errors[name] = str(e)
+                logger.warning(f"Warm-up import of {name} failed: {e}")
+            self.timings[name] = time.perf_counter() - t_start
+        logger.info(f"Import warm-up finished in {sum(self.timings.values()) * 1000:.0f} ms")
+        self.done.set()
+
+    def ready(self) -> bool:
+        return self.done.is_set()
+
+    def wait(self, timeout: float) -> bool:
+        return self.done.wait(timeout)